@@ -1,165 +1,475 @@
-from dataclasses import dataclass
-from typing import List, Dict, Set, Tuple
-from collections import defaultdict
+import sys
+from array import array
+from dataclasses import dataclass, field
+from typing import AbstractSet, List, Dict, Set, Tuple, Optional
+from collections import defaultdict, deque
 
-@dataclass
+# Interned epsilon and end-of-input markers shared by every set and table
+EPS = sys.intern('ε')
+END = sys.intern('$')
+
+@dataclass(slots=True)
 class Production:
     """Represents a production rule in the grammar"""
     left: str  # Left-hand side (non-terminal)
-    right: List[str]  # Right-hand side (terminals and non-terminals)
+    right: Tuple[str, ...]  # Right-hand side (terminals and non-terminals)
+    index: int = field(default=-1, repr=False, compare=False)  # Position in the grammar text
+    # Interned symbol ids, assigned by CFGParser.finalize
+    left_id: int = field(default=-1, init=False, repr=False, compare=False)
+    right_ids: Tuple[int, ...] = field(default=(), init=False, repr=False, compare=False)
+    # Id of the leading symbol when it is a terminal (ε included), else -1
+    first_terminal_id: int = field(default=-1, init=False, repr=False, compare=False)
+    # FIRST bitmask of the right-hand side, cached once FIRST sets exist
+    first_string: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    # True for an ε-production, whose expansion pushes nothing
+    is_empty: bool = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.is_empty = not self.right or self.right == (EPS,)
 
 class CFGParser:
     def __init__(self):
         self.productions: List[Production] = []
-        self.non_terminals: Set[str] = set()
-        self.terminals: Set[str] = set()
+        self.non_terminals: AbstractSet[str] = set()
+        self.terminals: AbstractSet[str] = set()
         self.start_symbol: str = None
+        # Productions grouped by their left-hand side
+        self.by_left: Dict[str, List[Production]] = defaultdict(list)
+        # Productions A -> A α, noted as they are read
+        self.direct_left_recursive: List[Production] = []
+        # Symbols named by %terminal, kept even if no rule uses them
+        self.declared_terminals: Set[str] = set()
         
     def parse_grammar(self, grammar_text: str) -> None:
         """Parse grammar rules from text format"""
-        lines = grammar_text.strip().split('\n')
-        for line in lines:
-            # Assume format: A -> B C | B D
-            left, right = line.split('->')
-            left = left.strip()
-            self.non_terminals.add(left)
+        # Read every line before touching the grammar, so a malformed line
+        # or a conflicting declaration leaves it unchanged
+        rules: List[Tuple[str, str]] = []
+        declared_terminals: Set[str] = set(self.declared_terminals)
+        non_terminals: Set[str] = set(self.non_terminals)
+        for line in grammar_text.split('\n'):
+            # Optional declarations: %terminal a b ... / %nonterminal A B ...
+            if line.lstrip().startswith('%'):
+                pragma, *symbols = line.split()
+                if pragma not in ('%terminal', '%nonterminal'):
+                    raise ValueError(f"Unknown declaration '{pragma}'")
+                if '|' in line:
+                    raise ValueError("Expected '|' only between alternatives")
+                if '->' in line:
+                    raise ValueError("Expected a single non-terminal before '->'")
+                symbols = [sys.intern(symbol) for symbol in symbols]
+                if pragma == '%terminal':
+                    declared_terminals.update(symbols)
+                else:
+                    non_terminals.update(symbols)
+                continue
             
+            # Assume format: A -> B C | B D
+            left, arrow, right = line.partition('->')
+            if '|' in left:
+                raise ValueError("Expected '|' only between alternatives")
+            if not arrow:
+                # Blank lines are skipped
+                if line.strip():
+                    raise ValueError(f"Expected '->' after '{line.split()[0]}'")
+                continue
+            left_symbols = left.split()
+            if len(left_symbols) != 1:
+                raise ValueError("Expected a single non-terminal before '->'")
+            if '->' in right:
+                raise ValueError(f"Expected one '->' in the rule for '{left_symbols[0]}'")
+            left = sys.intern(left_symbols[0])
+            non_terminals.add(left)
+            rules.append((left, right))
+        
+        # Without a rule there is no start symbol to parse from
+        if not rules and self.start_symbol is None:
+            raise ValueError("Expected at least one rule")
+        
+        # A symbol is a non-terminal iff some rule defines it or it is
+        # declared one; everything else on a right-hand side is a terminal
+        redeclared = declared_terminals & non_terminals
+        if redeclared:
+            raise ValueError(f"Declared terminals used as non-terminals: {sorted(redeclared)}")
+        self.declared_terminals = declared_terminals
+        # Also reopens the set that finalize froze
+        self.non_terminals = non_terminals
+        
+        # Identical alternatives are kept only once
+        seen: Set[Tuple[str, Tuple[str, ...]]] = {
+            (production.left, production.right) for production in self.productions
+        }
+        for left, right in rules:
             if not self.start_symbol:
                 self.start_symbol = left
                 
             # Handle multiple productions with |
-            for prod in right.split('|'):
-                symbols = prod.strip().split()
-                self.productions.append(Production(left, symbols))
-                
-                # Add terminals and non-terminals
-                for symbol in symbols:
-                    if symbol.isupper():
-                        self.non_terminals.add(symbol)
-                    else:
-                        self.terminals.add(symbol)
+            for alternative in right.split('|'):
+                symbols = tuple(sys.intern(symbol) for symbol in alternative.split())
+                if (left, symbols) in seen:
+                    continue
+                seen.add((left, symbols))
+                production = Production(left, symbols, len(self.productions))
+                self.productions.append(production)
+                self.by_left[left].append(production)
+                if symbols and symbols[0] == left:
+                    self.direct_left_recursive.append(production)
+        
+        self.terminals = {
+            symbol for production in self.productions
+            for symbol in production.right
+        } - self.non_terminals | self.declared_terminals
+
+    def finalize(self) -> None:
+        """Freeze the symbol sets and number the symbols once the grammar is complete"""
+        self.terminals = frozenset(self.terminals)
+        self.non_terminals = frozenset(self.non_terminals)
+        
+        # Symbol ids: ε is 0 and $ is 1, then the terminals, then the
+        # non-terminals, so a symbol is a terminal iff its id < n_terms
+        self.id_sym: List[str] = (
+            [EPS, END]
+            + sorted(self.terminals - {EPS, END})
+            + sorted(self.non_terminals)
+        )
+        self.sym_id: Dict[str, int] = {
+            symbol: index for index, symbol in enumerate(self.id_sym)
+        }
+        self.n_terms: int = len(self.id_sym) - len(self.non_terminals)
+        for prod in self.productions:
+            prod.left_id = self.sym_id[prod.left]
+            prod.right_ids = tuple(self.sym_id[symbol] for symbol in prod.right)
+            prod.first_terminal_id = (
+                prod.right_ids[0] if prod.right_ids and prod.right_ids[0] < self.n_terms else -1
+            )
 
 class LL1Parser:
     def __init__(self, cfg: CFGParser):
+        cfg.finalize()
         self.cfg = cfg
-        self.first: Dict[str, Set[str]] = defaultdict(set)
-        self.follow: Dict[str, Set[str]] = defaultdict(set)
+        self.n_terms = cfg.n_terms
+        # Productions grouped by left-hand side id, in grammar order
+        self._by_left: Dict[int, List[Production]] = {
+            cfg.sym_id[left]: prods for left, prods in cfg.by_left.items()
+        }
+        # Terminal ids double as bit indices, with ε at 0 and $ at 1
+        self.id_term: List[str] = cfg.id_sym[:cfg.n_terms]
+        self.term_id: Dict[str, int] = {
+            terminal: index for index, terminal in enumerate(self.id_term)
+        }
+        self.eps_mask: int = 1 << cfg.sym_id[EPS]
+        # AND-ing with this drops ε while copying a mask
+        self.no_eps_mask: int = ~self.eps_mask
+        # FIRST/FOLLOW sets are bitmasks over term_id, indexed by symbol id
+        self.first: List[int] = [0] * len(cfg.id_sym)
+        self.follow: List[int] = [0] * len(cfg.id_sym)
+        # nullable[symbol_id] is True when the symbol can derive ε
+        self.nullable: List[bool] = []
+        # table[nt_id - n_terms][term_id] is the production to expand, or None
+        self.table: List[List[Optional[Production]]] = []
+        # The same table keyed by (non-terminal, terminal) names
         self.parsing_table: Dict[Tuple[str, str], Production] = {}
+        # Table cells claimed by more than one production
+        self.conflicts: Dict[Tuple[str, str], List[Production]] = {}
         
+    def decode(self, mask: int) -> Set[str]:
+        """Expand a terminal bitmask back into a set of terminals"""
+        return {
+            terminal for index, terminal in enumerate(self.id_term)
+            if mask >> index & 1
+        }
+    
+    def first_set(self, symbol: str) -> Set[str]:
+        """FIRST set of a grammar symbol, as terminal names"""
+        return self.decode(self.first[self.cfg.sym_id[symbol]])
+    
+    def follow_set(self, symbol: str) -> Set[str]:
+        """FOLLOW set of a non-terminal, as terminal names"""
+        return self.decode(self.follow[self.cfg.sym_id[symbol]])
+        
+    def compute_nullable(self) -> None:
+        """Compute which symbols can derive ε"""
+        n_terms = self.n_terms
+        nullable = [False] * len(self.cfg.id_sym)
+        nullable[self.cfg.sym_id[EPS]] = True
+        
+        # Productions waiting on each non-terminal, and how many of each
+        # production's non-terminals are not yet known to be nullable.
+        # A production containing a real terminal can never derive ε.
+        waiting: Dict[int, List[Production]] = defaultdict(list)
+        pending: Dict[int, int] = {}
+        worklist = deque()
+        for prod in self.cfg.productions:
+            if any(symbol < n_terms and not nullable[symbol] for symbol in prod.right_ids):
+                continue
+            count = 0
+            for symbol in prod.right_ids:
+                if symbol >= n_terms:
+                    waiting[symbol].append(prod)
+                    count += 1
+            pending[prod.index] = count
+            if not count and not nullable[prod.left_id]:
+                nullable[prod.left_id] = True
+                worklist.append(prod.left_id)
+        
+        # Each newly nullable symbol counts down the productions using it
+        while worklist:
+            symbol = worklist.popleft()
+            for prod in waiting[symbol]:
+                pending[prod.index] -= 1
+                if not pending[prod.index] and not nullable[prod.left_id]:
+                    nullable[prod.left_id] = True
+                    worklist.append(prod.left_id)
+        
+        self.nullable = nullable
+    
     def compute_first_sets(self) -> None:
         """Compute FIRST sets for all symbols"""
-        changed = True
-        while changed:
-            changed = False
-            for prod in self.cfg.productions:
-                # Implementation of FIRST set computation
-                first_before = len(self.first[prod.left])
-                
-                if not prod.right:  # Empty production
-                    self.first[prod.left].add('ε')
-                    continue
-                    
-                first_symbol = prod.right[0]
-                if first_symbol in self.cfg.terminals:
-                    self.first[prod.left].add(first_symbol)
-                else:  # Non-terminal
-                    self.first[prod.left].update(
-                        self.first[first_symbol] - {'ε'}
-                    )
-                
-                if len(self.first[prod.left]) > first_before:
-                    changed = True
+        # Cached FIRST strings are stale once FIRST sets change
+        for prod in self.cfg.productions:
+            prod.first_string = None
+        self.compute_nullable()
+        by_left = self._by_left
+        n_terms = self.n_terms
+        eps = self.eps_mask
+        no_eps = self.no_eps_mask
+        first = self.first
+        nullable = self.nullable
+        
+        # ε is known up front from the nullable table, and a production
+        # led by a terminal contributes just that terminal, once. Only the
+        # productions led by a non-terminal take part in the fixed point.
+        nt_led: Dict[int, List[Production]] = {}
+        for left, prods in by_left.items():
+            if nullable[left]:
+                first[left] |= eps
+            for prod in prods:
+                if prod.first_terminal_id >= 0:
+                    first[left] |= 1 << prod.first_terminal_id
+                else:
+                    nt_led.setdefault(left, []).append(prod)
+        
+        # Left-hand sides whose FIRST depends on each non-terminal. Only
+        # the leading symbols a walk actually reaches (the nullable chain)
+        # are recorded.
+        dependents: Dict[int, Set[int]] = defaultdict(set)
+        
+        # Only left-hand sides depending on a grown FIRST set are revisited.
+        # Later rules tend to be the leaves, so they are seeded first.
+        worklist = deque(reversed(nt_led))
+        in_queue = set(worklist)
+        while worklist:
+            left = worklist.popleft()
+            in_queue.discard(left)
+            first_before = first[left]
+            first_left = first_before
+            
+            for prod in nt_led[left]:
+                # Walk leading symbols for as long as they can derive ε
+                for symbol in prod.right_ids:
+                    if symbol < n_terms:
+                        first_left |= 1 << symbol
+                        break
+                    dependents[symbol].add(left)
+                    first_left |= first[symbol] & no_eps
+                    if not nullable[symbol]:
+                        break
+            
+            if first_left != first_before:
+                first[left] = first_left
+                for dependent in dependents[left]:
+                    if dependent not in in_queue:
+                        in_queue.add(dependent)
+                        worklist.append(dependent)
     
     def compute_follow_sets(self) -> None:
         """Compute FOLLOW sets for all non-terminals"""
+        n_terms = self.n_terms
+        eps = self.eps_mask
+        no_eps = self.no_eps_mask
+        first = self.first
+        follow = self.follow
+        nullable = self.nullable
+        
+        # Edges A -> B for every B whose FOLLOW must include FOLLOW(A)
+        follow_edges: Dict[int, Set[int]] = defaultdict(set)
+        
+        # One right-to-left sweep per production tracks FIRST (without ε)
+        # and nullability of the suffix after each position. That seeds
+        # FOLLOW directly and yields the inclusion edges; the whole
+        # suffix is the FIRST string build_parsing_table needs.
+        for prod in self.cfg.productions:
+            left = prod.left_id
+            suffix_first = 0
+            suffix_nullable = True
+            for symbol in reversed(prod.right_ids):
+                if symbol < n_terms:
+                    suffix_first = 1 << symbol
+                    suffix_nullable = False
+                    continue
+                
+                follow[symbol] |= suffix_first
+                # If the rest of the production can derive ε
+                if suffix_nullable and symbol != left:
+                    follow_edges[left].add(symbol)
+                
+                if nullable[symbol]:
+                    suffix_first |= first[symbol] & no_eps
+                else:
+                    suffix_first = first[symbol] & no_eps
+                    suffix_nullable = False
+            prod.first_string = suffix_first | (eps if suffix_nullable else 0)
+        
         # Add $ to follow set of start symbol
-        self.follow[self.cfg.start_symbol].add('$')
-        
-        changed = True
-        while changed:
-            changed = False
-            for prod in self.cfg.productions:
-                for i, symbol in enumerate(prod.right):
-                    if symbol in self.cfg.non_terminals:
-                        follow_before = len(self.follow[symbol])
-                        
-                        # If it's not the last symbol
-                        if i < len(prod.right) - 1:
-                            next_symbol = prod.right[i + 1]
-                            if next_symbol in self.cfg.terminals:
-                                self.follow[symbol].add(next_symbol)
-                            else:
-                                self.follow[symbol].update(
-                                    self.first[next_symbol] - {'ε'}
-                                )
-                        
-                        # If it's the last symbol or next can derive ε
-                        if i == len(prod.right) - 1 or 'ε' in self.first[prod.right[i + 1]]:
-                            self.follow[symbol].update(self.follow[prod.left])
-                        
-                        if len(self.follow[symbol]) > follow_before:
-                            changed = True
+        follow[self.cfg.sym_id[self.cfg.start_symbol]] |= 1 << self.term_id[END]
+        
+        # Push FOLLOW sets along the edges; a non-terminal is revisited
+        # only when its own FOLLOW set grew
+        worklist = deque(follow_edges)
+        in_queue = set(worklist)
+        while worklist:
+            left = worklist.popleft()
+            in_queue.discard(left)
+            follow_left = follow[left]
+            for symbol in follow_edges[left]:
+                follow_before = follow[symbol]
+                follow_symbol = follow_before | follow_left
+                if follow_symbol != follow_before:
+                    follow[symbol] = follow_symbol
+                    if symbol in follow_edges and symbol not in in_queue:
+                        in_queue.add(symbol)
+                        worklist.append(symbol)
+    
+    def preprocess(self) -> None:
+        """Compute FIRST and FOLLOW sets and build the parsing table"""
+        self.compute_first_sets()
+        # Also caches every production's FIRST string for the table
+        self.compute_follow_sets()
+        self.build_parsing_table()
     
     def build_parsing_table(self) -> None:
-        """Build LL(1) parsing table"""
+        """Build LL(1) parsing table, recording conflicting entries"""
+        n_terms = self.n_terms
+        id_term = self.id_term
+        self.table = [[None] * n_terms for _ in range(len(self.cfg.id_sym) - n_terms)]
+        parsing_table = self.parsing_table
+        conflicts = self.conflicts
+        parsing_table.clear()
+        conflicts.clear()
+        # In grammar order, so the later alternative wins a conflicting cell
         for prod in self.cfg.productions:
-            first_string = self.compute_first_of_string(prod.right)
-            
-            for terminal in first_string - {'ε'}:
-                self.parsing_table[(prod.left, terminal)] = prod
+            first_string = self.production_first(prod)
+            lookaheads = first_string & self.no_eps_mask
+            # FOLLOW applies when the production can derive ε
+            if first_string & self.eps_mask:
+                lookaheads |= self.follow[prod.left_id]
             
-            if 'ε' in first_string:
-                for terminal in self.follow[prod.left]:
-                    self.parsing_table[(prod.left, terminal)] = prod
+            row = self.table[prod.left_id - n_terms]
+            while lookaheads:
+                # Peel off the lowest set bit, i.e. the next terminal id
+                low_bit = lookaheads & -lookaheads
+                lookaheads ^= low_bit
+                terminal = low_bit.bit_length() - 1
+                existing = row[terminal]
+                if existing is not None and existing is not prod:
+                    conflicts.setdefault((prod.left, id_term[terminal]), [existing]).append(prod)
+                row[terminal] = prod
+                parsing_table[(prod.left, id_term[terminal])] = prod
+        
+        self.compile()
     
-    def compute_first_of_string(self, symbols: List[str]) -> Set[str]:
-        """Compute FIRST set of a string of symbols"""
+    def production_first(self, prod: Production) -> int:
+        """FIRST bitmask of a production's right-hand side, cached on it"""
+        if prod.first_string is None:
+            prod.first_string = self.compute_first_of_string(prod.right_ids)
+        return prod.first_string
+    
+    def compute_first_of_string(self, symbols: Tuple[int, ...]) -> int:
+        """Compute FIRST bitmask of a string of symbol ids"""
+        n_terms = self.n_terms
+        # An empty string or a leading terminal is the whole answer
         if not symbols:
-            return {'ε'}
+            return self.eps_mask
+        if symbols[0] < n_terms:
+            return 1 << symbols[0]
             
-        result = set()
-        all_nullable = True
-        
+        first = self.first
+        nullable = self.nullable
+        no_eps = self.no_eps_mask
+        result = 0
         for symbol in symbols:
-            if symbol in self.cfg.terminals:
-                result.add(symbol)
-                all_nullable = False
+            if symbol < n_terms:
+                result |= 1 << symbol
                 break
-            else:
-                symbol_first = self.first[symbol]
-                result.update(symbol_first - {'ε'})
-                if 'ε' not in symbol_first:
-                    all_nullable = False
-                    break
-        
-        if all_nullable:
-            result.add('ε')
+            result |= first[symbol] & no_eps
+            if not nullable[symbol]:
+                break
+        else:
+            # Every symbol can derive ε
+            result |= self.eps_mask
         return result
     
+    def compile(self) -> None:
+        """Encode the parsing table over integer symbol ids for the drivers"""
+        n_terms = self.n_terms
+        n_non_terms = len(self.cfg.id_sym) - n_terms
+        symbol_id = self.cfg.sym_id
+        
+        productions = self.cfg.productions
+        
+        # Dense table[(nt_id - n_terms) * n_terms + term_id] of production
+        # indices, -1 if empty; 16-bit entries unless the grammar is huge
+        typecode = 'h' if len(productions) < 1 << 15 else 'i'
+        self._table: array = array(typecode, [-1]) * (n_non_terms * n_terms)
+        for row_index, row in enumerate(self.table):
+            base = row_index * n_terms
+            for terminal, prod in enumerate(row):
+                if prod is not None:
+                    self._table[base + terminal] = prod.index
+        # Symbol ids pushed when expanding each production (by prod.index,
+        # its position in cfg.productions), last symbol first
+        self._rhs_ids: List[Tuple[int, ...]] = [
+            () if prod.is_empty else prod.right_ids[::-1]
+            for prod in productions
+        ]
+        self._start_id: int = symbol_id[self.cfg.start_symbol]
+    
     def parse(self, input_string: str) -> bool:
         """Parse input string using LL(1) parsing table"""
-        input_string = input_string.split()
-        input_string.append('$')
+        term_id = self.term_id
+        tokens = []
+        for token in input_string.split():
+            if token not in term_id:
+                return False
+            tokens.append(term_id[token])
+        tokens.append(term_id[END])
         
-        stack = ['$', self.cfg.start_symbol]
-        index = 0
+        return _parse_ids(
+            tokens, self._start_id, term_id[END], self.n_terms,
+            self._table, self._rhs_ids
+        )
+
+
+def _parse_ids(tokens: List[int], start_id: int, end_id: int, n_terms: int,
+               table: array, rhs_ids: List[Tuple[int, ...]]) -> bool:
+    """LL(1) driver over integer-encoded tokens and symbols"""
+    stack = [end_id, start_id]
+    index = 0
+    
+    while stack:
+        top = stack.pop()
+        current_input = tokens[index]
         
-        while stack:
-            top = stack.pop()
-            current_input = input_string[index]
-            
-            if top in self.cfg.terminals or top == '$':
-                if top == current_input:
-                    index += 1
-                else:
-                    return False
+        if top < n_terms:
+            if top == current_input:
+                index += 1
             else:
-                if (top, current_input) not in self.parsing_table:
-                    return False
-                    
-                production = self.parsing_table[(top, current_input)]
-                if production.right != ['ε']:
-                    for symbol in reversed(production.right):
-                        stack.append(symbol)
-        
-        return True
\ No newline at end of file
+                return False
+        else:
+            production = table[(top - n_terms) * n_terms + current_input]
+            if production < 0:
+                return False
+                
+            stack.extend(rhs_ids[production])
+    
+    return True
@@ -1,218 +1,607 @@
-from dataclasses import dataclass
-from typing import List, Dict, Set, Tuple, Optional
-from collections import defaultdict
+import sys
+from dataclasses import dataclass, field
+from typing import AbstractSet, List, Dict, Set, Tuple, Optional
+from collections import defaultdict, deque
 
-@dataclass
+# Interned epsilon and end-of-input markers shared by every set and table
+EPS = sys.intern('ε')
+END = sys.intern('$')
+
+@dataclass(slots=True)
 class Production:
     """Represents a production rule in the grammar"""
     left: str  # Left-hand side (non-terminal)
-    right: List[str]  # Right-hand side (terminals and non-terminals)
+    right: Tuple[str, ...]  # Right-hand side (terminals and non-terminals)
+    index: int = field(default=-1, repr=False, compare=False)  # Position in the grammar text
+    # Interned symbol ids, assigned by CFGParser.finalize
+    left_id: int = field(default=-1, init=False, repr=False, compare=False)
+    right_ids: Tuple[int, ...] = field(default=(), init=False, repr=False, compare=False)
+    # Id of the leading symbol when it is a terminal (ε included), else -1
+    first_terminal_id: int = field(default=-1, init=False, repr=False, compare=False)
+    # FIRST bitmask of the right-hand side, cached once FIRST sets exist
+    first_string: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    # True for an ε-production, whose expansion pushes nothing
+    is_empty: bool = field(init=False, repr=False, compare=False)
+    # Rendered "A → α" form, built once since tables and traces repeat it
+    text: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.is_empty = not self.right or self.right == (EPS,)
+        self.text = f"{self.left} → {' '.join(self.right)}"
 
     def __str__(self):
-        return f"{self.left} → {' '.join(self.right)}"
+        return self.text
 
 class CFGParser:
     def __init__(self):
         self.productions: List[Production] = []
-        self.non_terminals: Set[str] = set()
-        self.terminals: Set[str] = set()
+        self.non_terminals: AbstractSet[str] = set()
+        self.terminals: AbstractSet[str] = set()
         self.start_symbol: str = None
+        # Productions grouped by their left-hand side
+        self.by_left: Dict[str, List[Production]] = defaultdict(list)
+        # Productions A -> A α, noted as they are read
+        self.direct_left_recursive: List[Production] = []
+        # Symbols named by %terminal, kept even if no rule uses them
+        self.declared_terminals: Set[str] = set()
         
     def parse_grammar(self, grammar_text: str) -> None:
         """Parse grammar rules from text format"""
-        lines = grammar_text.strip().split('\n')
-        for line in lines:
-            # Assume format: A -> B C | B D
-            left, right = line.split('->')
-            left = left.strip()
-            self.non_terminals.add(left)
+        # Read every line before touching the grammar, so a malformed line
+        # or a conflicting declaration leaves it unchanged
+        rules: List[Tuple[str, str]] = []
+        declared_terminals: Set[str] = set(self.declared_terminals)
+        non_terminals: Set[str] = set(self.non_terminals)
+        for line in grammar_text.split('\n'):
+            # Optional declarations: %terminal a b ... / %nonterminal A B ...
+            if line.lstrip().startswith('%'):
+                pragma, *symbols = line.split()
+                if pragma not in ('%terminal', '%nonterminal'):
+                    raise ValueError(f"Unknown declaration '{pragma}'")
+                if '|' in line:
+                    raise ValueError("Expected '|' only between alternatives")
+                if '->' in line:
+                    raise ValueError("Expected a single non-terminal before '->'")
+                symbols = [sys.intern(symbol) for symbol in symbols]
+                if pragma == '%terminal':
+                    declared_terminals.update(symbols)
+                else:
+                    non_terminals.update(symbols)
+                continue
             
+            # Assume format: A -> B C | B D
+            left, arrow, right = line.partition('->')
+            if '|' in left:
+                raise ValueError("Expected '|' only between alternatives")
+            if not arrow:
+                # Blank lines are skipped
+                if line.strip():
+                    raise ValueError(f"Expected '->' after '{line.split()[0]}'")
+                continue
+            left_symbols = left.split()
+            if len(left_symbols) != 1:
+                raise ValueError("Expected a single non-terminal before '->'")
+            if '->' in right:
+                raise ValueError(f"Expected one '->' in the rule for '{left_symbols[0]}'")
+            left = sys.intern(left_symbols[0])
+            non_terminals.add(left)
+            rules.append((left, right))
+        
+        # Without a rule there is no start symbol to parse from
+        if not rules and self.start_symbol is None:
+            raise ValueError("Expected at least one rule")
+        
+        # A symbol is a non-terminal iff some rule defines it or it is
+        # declared one; everything else on a right-hand side is a terminal
+        redeclared = declared_terminals & non_terminals
+        if redeclared:
+            raise ValueError(f"Declared terminals used as non-terminals: {sorted(redeclared)}")
+        self.declared_terminals = declared_terminals
+        # Also reopens the set that finalize froze
+        self.non_terminals = non_terminals
+        
+        # Identical alternatives are kept only once
+        seen: Set[Tuple[str, Tuple[str, ...]]] = {
+            (production.left, production.right) for production in self.productions
+        }
+        for left, right in rules:
             if not self.start_symbol:
                 self.start_symbol = left
                 
             # Handle multiple productions with |
-            for prod in right.split('|'):
-                symbols = prod.strip().split()
-                self.productions.append(Production(left, symbols))
-                
-                # Add terminals and non-terminals
-                for symbol in symbols:
-                    if symbol.isupper():
-                        self.non_terminals.add(symbol)
-                    else:
-                        self.terminals.add(symbol)
+            for alternative in right.split('|'):
+                symbols = tuple(sys.intern(symbol) for symbol in alternative.split())
+                if (left, symbols) in seen:
+                    continue
+                seen.add((left, symbols))
+                production = Production(left, symbols, len(self.productions))
+                self.productions.append(production)
+                self.by_left[left].append(production)
+                if symbols and symbols[0] == left:
+                    self.direct_left_recursive.append(production)
+        
+        self.terminals = {
+            symbol for production in self.productions
+            for symbol in production.right
+        } - self.non_terminals | self.declared_terminals
+
+    def finalize(self) -> None:
+        """Freeze the symbol sets and number the symbols once the grammar is complete"""
+        self.terminals = frozenset(self.terminals)
+        self.non_terminals = frozenset(self.non_terminals)
+        
+        # Symbol ids: ε is 0 and $ is 1, then the terminals, then the
+        # non-terminals, so a symbol is a terminal iff its id < n_terms
+        self.id_sym: List[str] = (
+            [EPS, END]
+            + sorted(self.terminals - {EPS, END})
+            + sorted(self.non_terminals)
+        )
+        self.sym_id: Dict[str, int] = {
+            symbol: index for index, symbol in enumerate(self.id_sym)
+        }
+        self.n_terms: int = len(self.id_sym) - len(self.non_terminals)
+        for prod in self.productions:
+            prod.left_id = self.sym_id[prod.left]
+            prod.right_ids = tuple(self.sym_id[symbol] for symbol in prod.right)
+            prod.first_terminal_id = (
+                prod.right_ids[0] if prod.right_ids and prod.right_ids[0] < self.n_terms else -1
+            )
 
 class LL1Parser:
     def __init__(self, cfg: CFGParser):
+        cfg.finalize()
         self.cfg = cfg
-        self.first: Dict[str, Set[str]] = defaultdict(set)
-        self.follow: Dict[str, Set[str]] = defaultdict(set)
+        self.n_terms = cfg.n_terms
+        # Productions grouped by left-hand side id, in grammar order
+        self._by_left: Dict[int, List[Production]] = {
+            cfg.sym_id[left]: prods for left, prods in cfg.by_left.items()
+        }
+        # Terminal ids double as bit indices, with ε at 0 and $ at 1
+        self.id_term: List[str] = cfg.id_sym[:cfg.n_terms]
+        self.term_id: Dict[str, int] = {
+            terminal: index for index, terminal in enumerate(self.id_term)
+        }
+        self.eps_mask: int = 1 << cfg.sym_id[EPS]
+        # AND-ing with this drops ε while copying a mask
+        self.no_eps_mask: int = ~self.eps_mask
+        # FIRST/FOLLOW sets are bitmasks over term_id, indexed by symbol id
+        self.first: List[int] = [0] * len(cfg.id_sym)
+        self.follow: List[int] = [0] * len(cfg.id_sym)
+        # nullable[symbol_id] is True when the symbol can derive ε
+        self.nullable: List[bool] = []
+        # table[nt_id - n_terms][term_id] is the production to expand, or None
+        self.table: List[List[Optional[Production]]] = []
+        # The same table keyed by (non-terminal, terminal) names
         self.parsing_table: Dict[Tuple[str, str], Production] = {}
+        # Table cells claimed by more than one production
+        self.conflicts: Dict[Tuple[str, str], List[Production]] = {}
+        
+    def decode(self, mask: int) -> Set[str]:
+        """Expand a terminal bitmask back into a set of terminals"""
+        return {
+            terminal for index, terminal in enumerate(self.id_term)
+            if mask >> index & 1
+        }
+    
+    def first_set(self, symbol: str) -> Set[str]:
+        """FIRST set of a grammar symbol, as terminal names"""
+        return self.decode(self.first[self.cfg.sym_id[symbol]])
+    
+    def follow_set(self, symbol: str) -> Set[str]:
+        """FOLLOW set of a non-terminal, as terminal names"""
+        return self.decode(self.follow[self.cfg.sym_id[symbol]])
         
+    def compute_nullable(self) -> None:
+        """Compute which symbols can derive ε"""
+        n_terms = self.n_terms
+        nullable = [False] * len(self.cfg.id_sym)
+        nullable[self.cfg.sym_id[EPS]] = True
+        
+        # Productions waiting on each non-terminal, and how many of each
+        # production's non-terminals are not yet known to be nullable.
+        # A production containing a real terminal can never derive ε.
+        waiting: Dict[int, List[Production]] = defaultdict(list)
+        pending: Dict[int, int] = {}
+        worklist = deque()
+        for prod in self.cfg.productions:
+            if any(symbol < n_terms and not nullable[symbol] for symbol in prod.right_ids):
+                continue
+            count = 0
+            for symbol in prod.right_ids:
+                if symbol >= n_terms:
+                    waiting[symbol].append(prod)
+                    count += 1
+            pending[prod.index] = count
+            if not count and not nullable[prod.left_id]:
+                nullable[prod.left_id] = True
+                worklist.append(prod.left_id)
+        
+        # Each newly nullable symbol counts down the productions using it
+        while worklist:
+            symbol = worklist.popleft()
+            for prod in waiting[symbol]:
+                pending[prod.index] -= 1
+                if not pending[prod.index] and not nullable[prod.left_id]:
+                    nullable[prod.left_id] = True
+                    worklist.append(prod.left_id)
+        
+        self.nullable = nullable
+    
     def compute_first_sets(self) -> None:
         """Compute FIRST sets for all symbols"""
-        changed = True
-        while changed:
-            changed = False
-            for prod in self.cfg.productions:
-                first_before = len(self.first[prod.left])
-                
-                if not prod.right:  # Empty production
-                    self.first[prod.left].add('ε')
-                    continue
-                    
-                first_symbol = prod.right[0]
-                if first_symbol in self.cfg.terminals:
-                    self.first[prod.left].add(first_symbol)
-                else:  # Non-terminal
-                    self.first[prod.left].update(
-                        self.first[first_symbol] - {'ε'}
-                    )
-                
-                if len(self.first[prod.left]) > first_before:
-                    changed = True
+        # Cached FIRST strings are stale once FIRST sets change
+        for prod in self.cfg.productions:
+            prod.first_string = None
+        self.compute_nullable()
+        by_left = self._by_left
+        n_terms = self.n_terms
+        eps = self.eps_mask
+        no_eps = self.no_eps_mask
+        first = self.first
+        nullable = self.nullable
+        
+        # ε is known up front from the nullable table, and a production
+        # led by a terminal contributes just that terminal, once. Only the
+        # productions led by a non-terminal take part in the fixed point.
+        nt_led: Dict[int, List[Production]] = {}
+        for left, prods in by_left.items():
+            if nullable[left]:
+                first[left] |= eps
+            for prod in prods:
+                if prod.first_terminal_id >= 0:
+                    first[left] |= 1 << prod.first_terminal_id
+                else:
+                    nt_led.setdefault(left, []).append(prod)
+        
+        # Left-hand sides whose FIRST depends on each non-terminal. Only
+        # the leading symbols a walk actually reaches (the nullable chain)
+        # are recorded.
+        dependents: Dict[int, Set[int]] = defaultdict(set)
+        
+        # Only left-hand sides depending on a grown FIRST set are revisited.
+        # Later rules tend to be the leaves, so they are seeded first.
+        worklist = deque(reversed(nt_led))
+        in_queue = set(worklist)
+        while worklist:
+            left = worklist.popleft()
+            in_queue.discard(left)
+            first_before = first[left]
+            first_left = first_before
+            
+            for prod in nt_led[left]:
+                # Walk leading symbols for as long as they can derive ε
+                for symbol in prod.right_ids:
+                    if symbol < n_terms:
+                        first_left |= 1 << symbol
+                        break
+                    dependents[symbol].add(left)
+                    first_left |= first[symbol] & no_eps
+                    if not nullable[symbol]:
+                        break
+            
+            if first_left != first_before:
+                first[left] = first_left
+                for dependent in dependents[left]:
+                    if dependent not in in_queue:
+                        in_queue.add(dependent)
+                        worklist.append(dependent)
     
     def compute_follow_sets(self) -> None:
         """Compute FOLLOW sets for all non-terminals"""
+        n_terms = self.n_terms
+        eps = self.eps_mask
+        no_eps = self.no_eps_mask
+        first = self.first
+        follow = self.follow
+        nullable = self.nullable
+        
+        # Edges A -> B for every B whose FOLLOW must include FOLLOW(A)
+        follow_edges: Dict[int, Set[int]] = defaultdict(set)
+        
+        # One right-to-left sweep per production tracks FIRST (without ε)
+        # and nullability of the suffix after each position. That seeds
+        # FOLLOW directly and yields the inclusion edges; the whole
+        # suffix is the FIRST string build_parsing_table needs.
+        for prod in self.cfg.productions:
+            left = prod.left_id
+            suffix_first = 0
+            suffix_nullable = True
+            for symbol in reversed(prod.right_ids):
+                if symbol < n_terms:
+                    suffix_first = 1 << symbol
+                    suffix_nullable = False
+                    continue
+                
+                follow[symbol] |= suffix_first
+                # If the rest of the production can derive ε
+                if suffix_nullable and symbol != left:
+                    follow_edges[left].add(symbol)
+                
+                if nullable[symbol]:
+                    suffix_first |= first[symbol] & no_eps
+                else:
+                    suffix_first = first[symbol] & no_eps
+                    suffix_nullable = False
+            prod.first_string = suffix_first | (eps if suffix_nullable else 0)
+        
         # Add $ to follow set of start symbol
-        self.follow[self.cfg.start_symbol].add('$')
+        follow[self.cfg.sym_id[self.cfg.start_symbol]] |= 1 << self.term_id[END]
         
-        changed = True
-        while changed:
-            changed = False
-            for prod in self.cfg.productions:
-                for i, symbol in enumerate(prod.right):
-                    if symbol in self.cfg.non_terminals:
-                        follow_before = len(self.follow[symbol])
-                        
-                        # If it's not the last symbol
-                        if i < len(prod.right) - 1:
-                            next_symbol = prod.right[i + 1]
-                            if next_symbol in self.cfg.terminals:
-                                self.follow[symbol].add(next_symbol)
-                            else:
-                                self.follow[symbol].update(
-                                    self.first[next_symbol] - {'ε'}
-                                )
-                        
-                        # If it's the last symbol or next can derive ε
-                        if i == len(prod.right) - 1 or 'ε' in self.first[prod.right[i + 1]]:
-                            self.follow[symbol].update(self.follow[prod.left])
-                        
-                        if len(self.follow[symbol]) > follow_before:
-                            changed = True
+        # Push FOLLOW sets along the edges; a non-terminal is revisited
+        # only when its own FOLLOW set grew
+        worklist = deque(follow_edges)
+        in_queue = set(worklist)
+        while worklist:
+            left = worklist.popleft()
+            in_queue.discard(left)
+            follow_left = follow[left]
+            for symbol in follow_edges[left]:
+                follow_before = follow[symbol]
+                follow_symbol = follow_before | follow_left
+                if follow_symbol != follow_before:
+                    follow[symbol] = follow_symbol
+                    if symbol in follow_edges and symbol not in in_queue:
+                        in_queue.add(symbol)
+                        worklist.append(symbol)
+    
+    def preprocess(self) -> None:
+        """Compute FIRST and FOLLOW sets and build the parsing table"""
+        self.compute_first_sets()
+        # Also caches every production's FIRST string for the table
+        self.compute_follow_sets()
+        self.build_parsing_table()
     
     def build_parsing_table(self) -> None:
-        """Build LL(1) parsing table"""
+        """Build LL(1) parsing table, recording conflicting entries"""
+        n_terms = self.n_terms
+        id_term = self.id_term
+        self.table = [[None] * n_terms for _ in range(len(self.cfg.id_sym) - n_terms)]
+        parsing_table = self.parsing_table
+        conflicts = self.conflicts
+        parsing_table.clear()
+        conflicts.clear()
+        # In grammar order, so the later alternative wins a conflicting cell
         for prod in self.cfg.productions:
-            first_string = self.compute_first_of_string(prod.right)
+            first_string = self.production_first(prod)
+            lookaheads = first_string & self.no_eps_mask
+            # FOLLOW applies when the production can derive ε
+            if first_string & self.eps_mask:
+                lookaheads |= self.follow[prod.left_id]
             
-            for terminal in first_string - {'ε'}:
-                self.parsing_table[(prod.left, terminal)] = prod
-            
-            if 'ε' in first_string:
-                for terminal in self.follow[prod.left]:
-                    self.parsing_table[(prod.left, terminal)] = prod
+            row = self.table[prod.left_id - n_terms]
+            while lookaheads:
+                # Peel off the lowest set bit, i.e. the next terminal id
+                low_bit = lookaheads & -lookaheads
+                lookaheads ^= low_bit
+                terminal = low_bit.bit_length() - 1
+                existing = row[terminal]
+                if existing is not None and existing is not prod:
+                    conflicts.setdefault((prod.left, id_term[terminal]), [existing]).append(prod)
+                row[terminal] = prod
+                parsing_table[(prod.left, id_term[terminal])] = prod
+        
+        self.compile()
     
-    def compute_first_of_string(self, symbols: List[str]) -> Set[str]:
-        """Compute FIRST set of a string of symbols"""
+    def production_first(self, prod: Production) -> int:
+        """FIRST bitmask of a production's right-hand side, cached on it"""
+        if prod.first_string is None:
+            prod.first_string = self.compute_first_of_string(prod.right_ids)
+        return prod.first_string
+    
+    def compute_first_of_string(self, symbols: Tuple[int, ...]) -> int:
+        """Compute FIRST bitmask of a string of symbol ids"""
+        n_terms = self.n_terms
+        # An empty string or a leading terminal is the whole answer
         if not symbols:
-            return {'ε'}
+            return self.eps_mask
+        if symbols[0] < n_terms:
+            return 1 << symbols[0]
             
-        result = set()
-        all_nullable = True
-        
+        first = self.first
+        nullable = self.nullable
+        no_eps = self.no_eps_mask
+        result = 0
         for symbol in symbols:
-            if symbol in self.cfg.terminals:
-                result.add(symbol)
-                all_nullable = False
+            if symbol < n_terms:
+                result |= 1 << symbol
                 break
-            else:
-                symbol_first = self.first[symbol]
-                result.update(symbol_first - {'ε'})
-                if 'ε' not in symbol_first:
-                    all_nullable = False
-                    break
-        
-        if all_nullable:
-            result.add('ε')
+            result |= first[symbol] & no_eps
+            if not nullable[symbol]:
+                break
+        else:
+            # Every symbol can derive ε
+            result |= self.eps_mask
         return result
     
+    def compile(self) -> None:
+        """Encode the expansions over integer symbol ids for parse_with_trace"""
+        # Symbol ids pushed when expanding each production (by prod.index,
+        # its position in cfg.productions), last symbol first
+        self._rhs_ids: List[Tuple[int, ...]] = [
+            () if prod.is_empty else prod.right_ids[::-1]
+            for prod in self.cfg.productions
+        ]
+        self._start_id: int = self.cfg.sym_id[self.cfg.start_symbol]
+    
     def display_parsing_table(self) -> None:
         """Display the LL(1) parsing table with proper formatting."""
         print("\n--- LL(1) Parsing Table ---")
 
         # Collect all terminals and add '$' for end-of-input marker
-        terminals = sorted(self.cfg.terminals) + ['$']
+        terminals = sorted(self.cfg.terminals) + [END]
         non_terminals = sorted(self.cfg.non_terminals)
+        symbol_id = self.cfg.sym_id
 
         # Determine column width dynamically based on longest terminal/non-terminal or production
         column_width = max(
             10,  # Minimum width for readability
             max(len(str(nt)) for nt in non_terminals + terminals),
-            max(len(str(prod)) for prod in self.parsing_table.values()) if self.parsing_table else 0
+            max(len(prod.text) for prod in self.parsing_table.values()) if self.parsing_table else 0
         )
         
-        # Print the header row
-        print(f"{'NT/T'.ljust(column_width)}", end="")
-        for terminal in terminals:
-            print(f"{terminal.ljust(column_width)}", end="")
-        print()
-
-        # Print the table rows for each non-terminal
+        # Before the table is built every cell is empty
+        empty_row = [None] * self.n_terms
+        
+        # Build the header and one row per non-terminal, then write them at once
+        rows = [''.join(cell.ljust(column_width) for cell in ['NT/T'] + terminals)]
         for nt in non_terminals:
-            print(f"{nt.ljust(column_width)}", end="")
+            cells = [nt]
+            row = self.table[symbol_id[nt] - self.n_terms] if self.table else empty_row
             for terminal in terminals:
-                production = self.parsing_table.get((nt, terminal), None)
-                cell = str(production) if production else "-"
-                print(f"{cell.ljust(column_width)}", end="")
-            print()  # New line
+                production = row[symbol_id[terminal]]
+                cells.append(production.text if production else "-")
+            rows.append(''.join(cell.ljust(column_width) for cell in cells))
+        sys.stdout.write('\n'.join(rows) + '\n')
 
     
-    def parse_with_trace(self, input_string: str) -> None:
-        """Parse input string with detailed tracing"""
+    def parse_with_trace(self, input_string: str, trace: bool = True) -> bool:
+        """Parse input string, printing each step unless trace is False"""
         input_string = input_string.split()
-        input_string.append('$')
+        input_string.append(END)
         
-        stack = ['$', self.cfg.start_symbol]
+        # Run on the compiled integer tables; unknown tokens become -1
+        n_terms = self.n_terms
+        names = self.cfg.id_sym
+        rows = self.table
+        token_ids = [self.term_id.get(token, -1) for token in input_string]
+        stack = [self.term_id[END], self._start_id]
         index = 0
         
-        print("\n--- Parsing Trace ---")
-        print(f"{'Stack':30} {'Input':30} {'Action':30}")
-        print("-" * 90)
+        # Remaining input is a slice of the joined tokens, starting at each
+        # token's offset; stack_text[k] renders stack[:k + 1] top first, so
+        # a push renders one symbol instead of the whole stack
+        if trace:
+            joined_input = ' '.join(input_string)
+            offsets = []
+            offset = 0
+            for token in input_string:
+                offsets.append(offset)
+                offset += len(token) + 1
+            stack_text = [names[stack[0]]]
+            stack_text.append(f"{names[stack[1]]} {stack_text[0]}")
         
-        while stack:
-            # Print current state
-            current_stack = ' '.join(reversed(stack))
-            current_input = ' '.join(input_string[index:])
-            print(f"{current_stack:30} {current_input:30}", end="")
-            
-            top = stack.pop()
-            current_input_symbol = input_string[index]
-            
-            if top in self.cfg.terminals or top == '$':
-                if top == current_input_symbol:
-                    print(f"{'Match ' + top:30}")
-                    index += 1
-                    if index >= len(input_string):
-                        print("\nParse successful!")
-                        return
+        # Trace lines are collected and written out in one go
+        log = [
+            "\n--- Parsing Trace ---",
+            f"{'Stack':30} {'Input':30} {'Action':30}",
+            "-" * 90,
+        ] if trace else []
+        try:
+            while stack:
+                # Current state
+                if trace:
+                    state = f"{stack_text.pop():30} {joined_input[offsets[index]:]:30}"
+                
+                top = stack.pop()
+                current_input_id = token_ids[index]
+                
+                if top < n_terms:
+                    if top == current_input_id:
+                        if trace:
+                            log.append(state + f"{'Match ' + names[top]:30}")
+                        index += 1
+                        if index >= len(input_string):
+                            if trace:
+                                log.append("\nParse successful!")
+                            return True
+                    else:
+                        if trace:
+                            log.append(state + f"{'ERROR: Terminal mismatch':30}")
+                        return False
                 else:
-                    print(f"{'ERROR: Terminal mismatch':30}")
-                    return
-            else:
-                if (top, current_input_symbol) not in self.parsing_table:
-                    print(f"{'ERROR: No matching production':30}")
-                    return
-                    
-                production = self.parsing_table[(top, current_input_symbol)]
-                print(f"{'Expand ' + str(production):30}")
+                    production = None
+                    if current_input_id >= 0:
+                        production = rows[top - n_terms][current_input_id]
+                    if production is None:
+                        if trace:
+                            log.append(state + f"{'ERROR: No matching production':30}")
+                        return False
+                        
+                    pushed = self._rhs_ids[production.index]
+                    stack.extend(pushed)
+                    if trace:
+                        log.append(state + f"{'Expand ' + production.text:30}")
+                        for symbol in pushed:
+                            stack_text.append(f"{names[symbol]} {stack_text[-1]}")
+            
+            if trace:
+                log.append("\nParse unsuccessful!")
+            return False
+        finally:
+            if trace:
+                sys.stdout.write("\n".join(log) + "\n")
+
+    def detect_indirect_left_recursion(self) -> List[str]:
+        """Non-terminals that can derive themselves as a leftmost symbol"""
+        indirect_left_recursive = []
+        
+        # Left-corner graph over symbol ids: A -> B when B can start A,
+        # i.e. B leads a right-hand side or follows only nullable
+        # symbols. This can run before FIRST sets exist, so the
+        # nullable table is computed here.
+        self.compute_nullable()
+        n_terms = self.n_terms
+        n_symbols = len(self.cfg.id_sym)
+        derivation_graph: List[List[int]] = [[] for _ in range(n_symbols)]
+        for prod in self.cfg.productions:
+            successors = derivation_graph[prod.left_id]
+            for symbol in prod.right_ids:
+                if symbol < n_terms:
+                    break
+                if symbol not in successors:
+                    successors.append(symbol)
+                if not self.nullable[symbol]:
+                    break
+        
+        # Tarjan's strongly connected components with an explicit stack;
+        # a component is left-recursive if it has several members or
+        # its only member derives itself directly
+        index_of = [-1] * n_symbols
+        low = [0] * n_symbols
+        on_stack = [False] * n_symbols
+        component_stack = []
+        counter = 0
+        for root in range(n_terms, n_symbols):
+            if index_of[root] >= 0:
+                continue
+            index_of[root] = low[root] = counter
+            counter += 1
+            component_stack.append(root)
+            on_stack[root] = True
+            work = [(root, 0)]
+            while work:
+                node, edge = work[-1]
+                successors = derivation_graph[node]
+                if edge < len(successors):
+                    work[-1] = (node, edge + 1)
+                    successor = successors[edge]
+                    if index_of[successor] < 0:
+                        index_of[successor] = low[successor] = counter
+                        counter += 1
+                        component_stack.append(successor)
+                        on_stack[successor] = True
+                        work.append((successor, 0))
+                    elif on_stack[successor]:
+                        low[node] = min(low[node], index_of[successor])
+                    continue
                 
-                if production.right != ['ε']:
-                    for symbol in reversed(production.right):
-                        stack.append(symbol)
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index_of[node]:
+                    component = []
+                    while True:
+                        member = component_stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in successors:
+                        indirect_left_recursive.extend(component)
         
-        print("\nParse unsuccessful!")
+        return sorted(self.cfg.id_sym[nt] for nt in indirect_left_recursive)
 
     def validate_grammar(self) -> bool:
         """
@@ -226,88 +615,15 @@ class LL1Parser:
         """
         # Detect Direct Left Recursion
         def detect_direct_left_recursion():
-            direct_left_recursive = []
-            for prod in self.cfg.productions:
-                # Check if the first symbol of the production's right side 
-                # is the same as the left-hand non-terminal
-                if prod.right and prod.right[0] == prod.left:
-                    direct_left_recursive.append(prod)
-            return direct_left_recursive
-
-        # Detect Indirect Left Recursion
-        def detect_indirect_left_recursion():
-            indirect_left_recursive = []
-            
-            # Create a derivation graph
-            derivation_graph = defaultdict(set)
-            for prod in self.cfg.productions:
-                left = prod.left
-                for symbol in prod.right:
-                    if symbol in self.cfg.non_terminals and symbol != left:
-                        derivation_graph[left].add(symbol)
-            
-            # Check for cycles that can lead to left recursion
-            def has_path_to_self(start, current, visited=None):
-                if visited is None:
-                    visited = set()
-                
-                if current == start:
-                    return True
-                
-                visited.add(current)
-                
-                for next_symbol in derivation_graph[current]:
-                    if next_symbol not in visited:
-                        if has_path_to_self(start, next_symbol, visited):
-                            return True
-                
-                return False
-            
-            # Check each non-terminal for potential indirect left recursion
-            for nt in self.cfg.non_terminals:
-                if has_path_to_self(nt, nt):
-                    indirect_left_recursive.append(nt)
-            
-            return indirect_left_recursive
+            # parse_grammar notes each A -> A α production as it reads it
+            return self.cfg.direct_left_recursive
 
         # Detect Ambiguity in Parsing Table
         def detect_parsing_table_ambiguity():
-            ambiguous_entries = {}
-            
-            # Compute First and Follow sets if not already computed
-            if not self.first:
-                self.compute_first_sets()
-            if not self.follow:
-                self.compute_follow_sets()
-            
-            # Detect conflicts during parsing table construction
-            for prod in self.cfg.productions:
-                first_string = self.compute_first_of_string(prod.right)
-                
-                # Check conflicts for terminals in FIRST set
-                for terminal in first_string - {'ε'}:
-                    key = (prod.left, terminal)
-                    if key in self.parsing_table:
-                        # Conflict detected if different productions exist for same (NT, Terminal)
-                        if self.parsing_table[key] != prod:
-                            if key not in ambiguous_entries:
-                                ambiguous_entries[key] = [self.parsing_table[key], prod]
-                            else:
-                                ambiguous_entries[key].append(prod)
-                
-                # Check conflicts for FOLLOW set when production can derive ε
-                if 'ε' in first_string:
-                    for terminal in self.follow[prod.left]:
-                        key = (prod.left, terminal)
-                        if key in self.parsing_table:
-                            # Conflict detected if different productions exist for same (NT, Terminal)
-                            if self.parsing_table[key] != prod:
-                                if key not in ambiguous_entries:
-                                    ambiguous_entries[key] = [self.parsing_table[key], prod]
-                                else:
-                                    ambiguous_entries[key].append(prod)
-            
-            return ambiguous_entries
+            # Building the table records every conflict, and leaves the
+            # sets and table ready for parsing
+            self.preprocess()
+            return self.conflicts
 
         try:
             # 1. Check Direct Left Recursion
@@ -319,7 +635,7 @@ class LL1Parser:
                 return False
             
             # 2. Check Indirect Left Recursion
-            #indirect_left_recursive = detect_indirect_left_recursion()
+            #indirect_left_recursive = self.detect_indirect_left_recursion()
             #if indirect_left_recursive:
             #    error_msg = "Indirect Left Recursion Detected in Non-Terminals:\n"
             #    error_msg += ", ".join(indirect_left_recursive)
@@ -350,14 +666,6 @@ class LL1Parser:
         - True if parser is ready for parsing
         - False if grammar validation fails
         """
-        if not self.validate_grammar():
-            return False
-        
-        try:
-            self.compute_first_sets()
-            self.compute_follow_sets()
-            self.build_parsing_table()
-            return True
-        except Exception as e:
-            print(f"Error preparing parser: {e}")
-            return False
+        # Validation computes the sets and builds the table while looking
+        # for conflicts, so a valid grammar leaves nothing else to do
+        return self.validate_grammar()
@@ -0,0 +1,168 @@
+import contextlib
+import io
+import unittest
+
+import parser
+from parser1 import CFGParser, LL1Parser
+
+
+def make_parser(grammar: str) -> LL1Parser:
+    cfg = CFGParser()
+    cfg.parse_grammar(grammar)
+    return LL1Parser(cfg)
+
+
+def validate_quietly(parser: LL1Parser) -> bool:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parser.validate_grammar()
+
+
+class ParseTest(unittest.TestCase):
+    def test_later_alternative_wins_conflicting_cell(self):
+        # FIRST(S -> A a) and FIRST(S -> b) both hold b; the table keeps
+        # the later alternative, as it always has
+        cfg = parser.CFGParser()
+        cfg.parse_grammar("S -> A a | b\nA -> b | ε")
+        ll1 = parser.LL1Parser(cfg)
+        ll1.preprocess()
+        self.assertTrue(ll1.parse('b'))
+        self.assertFalse(ll1.parse('b a'))
+
+    def test_productions_keep_grammar_order(self):
+        cfg = parser.CFGParser()
+        cfg.parse_grammar("E -> T EREST\nEREST -> + T EREST | ε\nT -> id")
+        parser.LL1Parser(cfg)
+        self.assertEqual(
+            [prod.right for prod in cfg.productions],
+            [('T', 'EREST'), ('+', 'T', 'EREST'), ('ε',), ('id',)],
+        )
+
+
+class DeclarationTest(unittest.TestCase):
+    def test_declared_terminal_kept_without_rules_using_it(self):
+        cfg = CFGParser()
+        cfg.parse_grammar("%terminal z\nS -> a S | ε")
+        self.assertEqual(cfg.terminals, {'a', 'z', 'ε'})
+
+    def test_declared_non_terminal(self):
+        cfg = CFGParser()
+        cfg.parse_grammar("%nonterminal X\nS -> a X\nX -> b")
+        self.assertEqual(cfg.non_terminals, {'S', 'X'})
+        self.assertEqual(cfg.terminals, {'a', 'b'})
+        self.assertEqual(cfg.start_symbol, 'S')
+
+    def test_unknown_declaration(self):
+        with self.assertRaisesRegex(ValueError, "Unknown declaration '%token'"):
+            CFGParser().parse_grammar("%token a\nS -> a")
+
+    def test_declared_terminal_with_rules_leaves_grammar_unchanged(self):
+        cfg = CFGParser()
+        cfg.parse_grammar("S -> a A")
+        with self.assertRaisesRegex(ValueError, "Declared terminals used as non-terminals"):
+            cfg.parse_grammar("%terminal A\nA -> b")
+        self.assertEqual([str(prod) for prod in cfg.productions], ['S → a A'])
+        self.assertEqual(cfg.non_terminals, {'S'})
+        self.assertEqual(cfg.declared_terminals, set())
+
+    def test_malformed_line_leaves_grammar_unchanged(self):
+        cfg = CFGParser()
+        with self.assertRaisesRegex(ValueError, "Expected '->' after 'A'"):
+            cfg.parse_grammar("S -> a\nA b")
+        self.assertEqual(cfg.productions, [])
+        self.assertIsNone(cfg.start_symbol)
+
+
+class TraceTest(unittest.TestCase):
+    def setUp(self):
+        self.parser = make_parser("S -> a S b | ε")
+        validate_quietly(self.parser)
+
+    def test_result_returned_without_output(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertTrue(self.parser.parse_with_trace('a a b b', trace=False))
+            self.assertFalse(self.parser.parse_with_trace('a b b', trace=False))
+            self.assertFalse(self.parser.parse_with_trace('a x', trace=False))
+        self.assertEqual(output.getvalue(), '')
+
+    def test_traced_parse_returns_result(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertTrue(self.parser.parse_with_trace('a b'))
+            self.assertFalse(self.parser.parse_with_trace('a x'))
+        self.assertIn("Parse successful!", output.getvalue())
+        self.assertIn("ERROR: No matching production", output.getvalue())
+
+
+class DisplayTest(unittest.TestCase):
+    def test_table_not_built_yet_shows_empty_cells(self):
+        parser = make_parser("S -> a S | ε")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            parser.display_parsing_table()
+        self.assertEqual(output.getvalue().splitlines()[-1].split(), ['S', '-', '-', '-'])
+
+
+class AmbiguityTest(unittest.TestCase):
+    def test_conflicting_alternatives_rejected(self):
+        parser = make_parser("S -> a | a b")
+        self.assertFalse(validate_quietly(parser))
+        self.assertEqual(list(parser.conflicts), [('S', 'a')])
+        self.assertEqual(
+            [str(prod) for prod in parser.conflicts[('S', 'a')]],
+            ['S → a', 'S → a b'],
+        )
+
+
+class DeduplicationTest(unittest.TestCase):
+    def test_identical_alternatives_kept_once(self):
+        parser = make_parser("S -> A\nA -> B | B\nB -> b")
+        self.assertEqual([str(prod) for prod in parser.cfg.productions], ['S → A', 'A → B', 'B → b'])
+        self.assertTrue(validate_quietly(parser))
+        self.assertEqual(parser.conflicts, {})
+
+
+class GrammarTextTest(unittest.TestCase):
+    def test_grammar_without_rules(self):
+        for text in ("", "\n\n", "%terminal a"):
+            cfg = CFGParser()
+            with self.assertRaisesRegex(ValueError, "Expected at least one rule"):
+                cfg.parse_grammar(text)
+            self.assertEqual(cfg.declared_terminals, set())
+
+    def test_declarations_added_to_existing_grammar(self):
+        cfg = CFGParser()
+        cfg.parse_grammar("S -> a")
+        cfg.parse_grammar("%terminal z")
+        self.assertEqual(cfg.terminals, {'a', 'z'})
+
+    def test_second_arrow_in_rule(self):
+        with self.assertRaisesRegex(ValueError, "Expected one '->' in the rule for 'S'"):
+            CFGParser().parse_grammar("S -> a -> b")
+
+    def test_several_symbols_before_arrow(self):
+        with self.assertRaisesRegex(ValueError, "Expected a single non-terminal before '->'"):
+            CFGParser().parse_grammar("A B -> x")
+
+
+class IndirectLeftRecursionTest(unittest.TestCase):
+    def test_grammar_without_left_recursion(self):
+        parser = make_parser("E -> T\nT -> ( E ) | id")
+        self.assertEqual(parser.detect_indirect_left_recursion(), [])
+
+    def test_cycle_through_two_non_terminals(self):
+        parser = make_parser("A -> B x\nB -> A y | z")
+        self.assertEqual(parser.detect_indirect_left_recursion(), ['A', 'B'])
+
+    def test_recursion_hidden_behind_nullable_prefix(self):
+        parser = make_parser("S -> A S | b\nA -> ε | a")
+        self.assertEqual(parser.detect_indirect_left_recursion(), ['S'])
+
+    def test_detection_does_not_need_preprocessing(self):
+        # Detection runs before FIRST/FOLLOW sets are computed
+        parser = make_parser("S -> A b\nA -> ε | a")
+        self.assertEqual(parser.detect_indirect_left_recursion(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
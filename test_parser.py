@@ -17,12 +17,12 @@ if parser.prepare_parser():
     # Display FIRST sets
     print("\n--- FIRST Sets ---")
     for nt in cfg.non_terminals:
-        print(f"FIRST({nt}): {parser.first[nt]}")
+        print(f"FIRST({nt}): {parser.first_set(nt)}")
 
     # Display FOLLOW sets
     print("\n--- FOLLOW Sets ---")
     for nt in cfg.non_terminals:
-        print(f"FOLLOW({nt}): {parser.follow[nt]}")
+        print(f"FOLLOW({nt}): {parser.follow_set(nt)}")
 
     # Display Parsing Table
     parser.display_parsing_table()